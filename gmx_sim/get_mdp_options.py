@@ -1,12 +1,21 @@
-import os
-from pathlib import Path
+import functools
 import re
 from typing import Any
-import requests
-from bs4 import BeautifulSoup
+from lxml import etree, html
 import toml
+from .utils import CACHE, atomic_write_toml
 
-CACHE = Path(f"{os.environ['HOME']}/.gmx_sim")
+# all links to mdp options, without the header links (¶)
+MDP_LINKS = etree.XPath('//a[contains(@href, "mdp") and normalize-space(.) != "¶"]')
+
+
+@functools.cache
+def _session():
+    """ Http layer cache, revalidates expired responses with ETag/Last-Modified.
+    Created on first use and shared by all calls, so the connection is kept alive
+    between gmx versions."""
+    import requests_cache  # pylint: disable=import-outside-toplevel
+    return requests_cache.CachedSession(CACHE / "http_cache.sqlite", expire_after=86400)
 
 
 class CachedMdpOptions(dict):
@@ -18,18 +27,20 @@ class CachedMdpOptions(dict):
             CACHE.mkdir(parents=True)
         if self.cache_file.exists():
             for key, item in toml.load(self.cache_file).items():
-                self[key] = item
+                super().__setitem__(key, item)
+        self._dirty = False
 
     def __setitem__(self, __key: Any, __value: Any) -> None:
-        """ Save to cache if new item is added."""
-        store = False
+        """ Mark cache as dirty if new item is added, written on save."""
         if __key not in self:
-            store = True
-        return_val = super().__setitem__(__key, __value)
-        if store:
-            with open(self.cache_file, "w", encoding="utf-8") as fh:
-                toml.dump(self, fh)
-        return return_val
+            self._dirty = True
+        return super().__setitem__(__key, __value)
+
+    def save(self) -> None:
+        """ Write the cache file, if new items were added."""
+        if self._dirty:
+            atomic_write_toml(self.cache_file, self)
+            self._dirty = False
 
 
 def get_mdp_options(gmx_version: str) -> list[str]:
@@ -56,18 +67,11 @@ def get_mdp_options(gmx_version: str) -> list[str]:
         return cache[url]
 
     # Make request and parse html
-    response = requests.get(url, timeout=100)
-    soup = BeautifulSoup(response.content, "html.parser")
-
-    mdp_options = []
-    hits = soup.find_all("a")
-    if len(hits) == 0:
+    response = _session().get(url, timeout=100)
+    tree = html.fromstring(response.content)
+    mdp_options = [str(hit.text_content()) for hit in MDP_LINKS(tree)]
+    if len(mdp_options) == 0:
         raise RuntimeError(f"Could not find hits for {gmx_version=}")
-    for hit in hits:
-        href = hit.attrs.get("href")
-        if "mdp" in href:
-            text = hit.get_text()
-            if text != "¶":
-                mdp_options.append(text)
     cache[url] = mdp_options
+    cache.save()
     return mdp_options
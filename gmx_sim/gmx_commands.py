@@ -1,8 +1,10 @@
 # pylint: disable=logging-fstring-interpolation
+import os
 import subprocess
 from pathlib import Path
 from typing import Optional, Union
-import difflib
+import functools
+from rapidfuzz import fuzz, process
 import gmx_sim
 from utils import to_path
 import logging
@@ -10,10 +12,21 @@ from utils import FileCreationLogger
 from gmx_subprocess import run_subprocess
 
 
+@functools.lru_cache(maxsize=None)
+def _list_ff(path: str, mtime: float) -> tuple[str, ...]:
+    """List the force fields in path. The mtime of path is only part of the cache key,
+    so the cached listing is dropped when the directory changes."""
+    # pylint: disable=unused-argument
+    with os.scandir(path) as entries:
+        return tuple(
+            entry.name for entry in entries if entry.name.endswith(".ff") and entry.is_dir()
+        )
+
+
 def check_force_field(force_field: str) -> str:
     """Check if the forcefield exists in either $GMXDATA/top or $GMXLIB or cwd.
-    If not, find all available force fields, look for the closest match and
-    ask if the user wants to use it."""
+    If it only differs in case, use the existing one. If not, find all available
+    force fields, look for the closest match and ask if the user wants to use it."""
     if not force_field.endswith(".ff"):
         force_field += ".ff"
     # find all available force fields
@@ -21,12 +34,23 @@ def check_force_field(force_field: str) -> str:
     path_list = [Path(env["GMXDATA"]) / "top", Path(env["GMXLIB"]), Path(".")]
     ff_names = []
     for path in path_list:
-        if (path := Path(path).resolve()).is_dir():
-            ff_names.extend([f.name for f in path.glob("*.ff")])
-    # check if the force field exists, if not find the closest match and ask for input
+        path = path.resolve()
+        try:
+            ff_names.extend(_list_ff(str(path), path.stat().st_mtime))
+        except OSError:
+            pass
+    ff_index = {name.casefold(): name for name in ff_names}
+    # check if the force field exists, if it only differs in case use the existing one,
+    # otherwise find the closest match and ask for input
     if force_field not in ff_names:
-        closest_match = difflib.get_close_matches(force_field, ff_names, n=1)[0]
+        if (case_match := ff_index.get(force_field.casefold())) is not None:
+            logging.info(f"Using {case_match} for {force_field=}")
+            return case_match.removesuffix(".ff")
         print(f"Could not find {force_field=} in $GMXDATA/top, $GMXLIB or cwd.")
+        match = process.extractOne(force_field, ff_names, scorer=fuzz.ratio, score_cutoff=60)
+        if match is None:
+            raise ValueError("Could not find force field.")
+        closest_match = match[0]
         accepted = input(f"Did you mean {closest_match}? [y/n]")
         if not accepted.lower() == "y":
             raise ValueError("Could not find force field.")
@@ -48,7 +72,7 @@ def pdb2gmx(
     pdb_file = to_path(pdb_file)
     if not pdb_file.is_file():
         raise ValueError(f"Could not find {pdb_file=}")
-    check_force_field(force_field)
+    force_field = check_force_field(force_field)
     # I cant automatically check for water, was it has either .itp or .gro extension
     # and other files might have the same extension.
     if not outfile:
@@ -1,7 +1,24 @@
+import collections
+import hashlib
+import os
+import re
+import shlex
+import shutil
 import subprocess
+import sys
+import time
 from pathlib import Path
 from typing import Optional, Union
+import toml
 import gmx_sim
+from gmx_sim.utils import CACHE, atomic_write_toml
+
+# without a file to compare against (gmx module), reprobe the env after one day
+ENV_CACHE_TTL = 86400
+# lines of env output that mention gromacs or a PATH, split into name and value
+ENV_RE = re.compile(r"^(?=.*(?:GMX|gromacs|PATH))([^=]*)=(.*)$")
+# lines of output printed on failure, if there is no out_file to read them from
+FAILED_OUTPUT_LINES = 1000
 
 
 class GromacsEnv(dict):
@@ -18,17 +35,38 @@ class GromacsEnv(dict):
         if gromacs_executable is None and gromacs_module is None:
             gromacs_executable = "gmx"
 
+        if (
+            gromacs_executable is not None
+            and os.sep not in gromacs_executable
+            and shutil.which(gromacs_executable) is not None
+        ):
+            # bare gmx name already in the environment, nothing to probe or cache,
+            # explicit paths are sourced via their GMXRC
+            for key, item in os.environ.items():
+                if ENV_RE.match(f"{key}={item}"):
+                    self[key] = item
+        else:
+            if gromacs_executable is not None:
+                # same cache file for a relative path, independent of cwd
+                gromacs_executable = os.path.abspath(gromacs_executable)
+            key = hashlib.sha1(
+                repr((gromacs_executable, gromacs_module, gmx_lib)).encode()
+            ).hexdigest()[:16]
+            cache_file = CACHE / f"env_{key}.toml"
+            if self.cache_is_valid(cache_file, gromacs_executable):
+                self.update(toml.load(cache_file))
+            else:
+                self.probe_env(gromacs_executable, gromacs_module)
+                atomic_write_toml(cache_file, self)
+        if clean_path:
+            self.clean_path()
+        self["GMXLIB"] = gmx_lib
+
+    def probe_env(self, gromacs_executable: Optional[str], gromacs_module: Optional[str]):
+        """Source GMXRC or load the module in a shell and read the gmx variables from env."""
         if gromacs_executable is not None:
-            # check if gmx_executable already in the environment
-            if (
-                subprocess.run(
-                    f"{gromacs_executable} --version", shell=True, check=True, capture_output=True
-                ).returncode
-                == 0
-            ):
-                command = "env"
             # check if gmx_executable is a path
-            elif (gmx_exe := Path(gromacs_executable)).is_file():
+            if (gmx_exe := Path(gromacs_executable)).is_file():
                 command = f". {gmx_exe.parent / 'GMXRC'} && env"
             else:
                 raise ValueError(f"Could not find gromacs executable: {gromacs_executable}")
@@ -43,15 +81,20 @@ class GromacsEnv(dict):
         )
         out = proc.stdout.decode("utf-8").split("\n")
         for line in out:
-            if "gromacs" in line or "GMX" in line:
-                key, item = line.split("=")
-                self[key] = item
-            if "PATH" in line:
-                key, item = line.split("=")
-                self[key] = item
-        if clean_path:
-            self.clean_path()
-        self["GMXLIB"] = gmx_lib
+            if match := ENV_RE.match(line):
+                self[match.group(1)] = match.group(2)
+
+    @staticmethod
+    def cache_is_valid(cache_file: Path, gromacs_executable: Optional[str]) -> bool:
+        """The cached env is valid if it is newer than the gmx executable. For a gmx
+        module, it is valid for ENV_CACHE_TTL seconds."""
+        if not cache_file.is_file():
+            return False
+        cache_mtime = cache_file.stat().st_mtime
+        if gromacs_executable is not None:
+            if (gmx_exe := Path(gromacs_executable)).is_file():
+                return cache_mtime > gmx_exe.stat().st_mtime
+        return time.time() - cache_mtime < ENV_CACHE_TTL
 
     def clean_path(self):
         """Kick all but the explicit directory to gmx, make sure it is only one."""
@@ -90,48 +133,57 @@ def get_env() -> GromacsEnv:
 
 
 def run_subprocess(
-    command: str,
+    command: Union[str, list[str]],
     env: dict[str, str],
     out_file: Optional[Union[str, Path]] = None,
     verbose: bool = False,
+    shell: bool = False,
 ):
-    """Run a subprocess with a given environment in a shell. If it fails, print the output
-    to console and optionally to file. If it succeeds, optionally print to console
-    and/or file.
+    """Run a subprocess with a given environment. If it fails, print the output
+    to console (the last FAILED_OUTPUT_LINES lines without out_file) and optionally
+    to file. If it succeeds, optionally print to console and/or file.
     Args:
-        command (str): The command to run
+        command (str, list[str]): The command to run
         env (dict[str, str]): The environment to run the command in
         out_file (str, Path): The file to write the output to. Default: None.
         verbose (bool): Whether to print the output to console. Default: False.
+        shell (bool): Whether to run the command in a shell, only needed for shell
+            features like pipes or globs. Default: False.
     """
-    stdout_mode = subprocess.PIPE
-    stderr_mode = subprocess.STDOUT
+    if not shell and isinstance(command, str):
+        command = shlex.split(command)
     if out_file:
         # pylint: disable=consider-using-with
-        output_stream = open(out_file, "w", encoding="utf-8")
+        # large buffer, so the gmx log is written in few syscalls
+        output_stream = open(out_file, "w", encoding="utf-8", buffering=1 << 20)
+    # only kept if the output cannot be recovered from out_file on failure
+    tail = collections.deque(maxlen=FAILED_OUTPUT_LINES)
     try:
-        # Run the command
-        process = subprocess.run(
+        # Run the command and stream the output optionally to file and/or console
+        with subprocess.Popen(
             command,
-            shell=True,
+            shell=shell,
             env=env,
-            stdout=stdout_mode,
-            stderr=stderr_mode,
-            universal_newlines=True,
-            check=True,
-        )
-        # Print the output optionally to file and/or console
-        if verbose:
-            print(process.stdout)
-        if out_file:
-            output_stream.write(process.stdout)
-    # handle errors
-    except subprocess.CalledProcessError as e:
-        # Print the output optionally to file, always to console
-        if out_file:
-            output_stream.write(e.stdout)
-        print(e.stdout)
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+        ) as process:
+            for line in process.stdout:
+                if out_file:
+                    output_stream.write(line)
+                if verbose:
+                    sys.stdout.write(line)
+                elif not out_file:
+                    tail.append(line)
     finally:
         # Close the output stream if it was opened
         if out_file:
             output_stream.close()
+    # handle errors, always print the output to console
+    if process.returncode != 0 and not verbose:
+        if out_file:
+            with open(out_file, encoding="utf-8") as fh:
+                sys.stdout.writelines(fh)
+        else:
+            sys.stdout.writelines(tail)
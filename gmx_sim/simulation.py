@@ -1,14 +1,13 @@
 import os
+import re
 import sys
 import shlex
 import subprocess
 import logging
 from typing import Any
 from collections import defaultdict
-import difflib
-import gromacs
+from rapidfuzz import fuzz, process
 import toml
-import numpy as np
 
 
 def setup_custom_logger(path, name="gmx_logger"):
@@ -28,6 +27,9 @@ def setup_custom_logger(path, name="gmx_logger"):
 
 
 LOGGER = setup_custom_logger(os.path.join(os.getcwd(), "gmx_sim.log"))
+GMX_ENV_RE = re.compile(r"^(?=.*GMX)([^=]*)=(.*)$")
+# imported in Simulation.set_gmx_path, once gmx is in the environment
+gromacs = None
 
 
 class Config(dict):
@@ -63,20 +65,22 @@ class Config(dict):
             + "ref config did you mean {}? y/n?"
         )
         if subkey:
-            ref_key = difflib.get_close_matches(subkey, self.ref_config[key].keys())
-            if len(ref_key) == 0:
+            match = process.extractOne(
+                subkey, self.ref_config[key].keys(), scorer=fuzz.ratio, score_cutoff=60
+            )
+            if match is None:
                 raise ValueError(f"Key: {key}/{subkey} not found in reference toml.")
-            else:
-                ref_key = ref_key[0]
+            ref_key = match[0]
             input_y_n = input(message.format(f"{key}/{subkey}", item, ref_key))
             if input_y_n == "y":
                 return ref_key
         else:
-            ref_key = difflib.get_close_matches(key, self.ref_config.keys())[0]
-            if len(ref_key) == 0:
+            match = process.extractOne(
+                key, self.ref_config.keys(), scorer=fuzz.ratio, score_cutoff=60
+            )
+            if match is None:
                 raise ValueError(f"Key: {key} not found in reference toml.")
-            else:
-                ref_key = ref_key[0]
+            ref_key = match[0]
             input_y_n = input(message.format(key, item, ref_key))
             if input_y_n == "y":
                 return ref_key
@@ -117,7 +121,7 @@ class SimFiles:
         # we sort files into the major path and minor path
         # based on file ending, with boring files in minor
         # all files not in major go in minor
-        self.major_files = [".xtc"]
+        self.major_files = frozenset({".xtc"})
 
     def add_files(self, names: str) -> str:
         """Add names for files to internal file state.
@@ -127,14 +131,14 @@ class SimFiles:
         # convert all file names to corresponding paths
         file_paths = []
         for file_name in names:
-            file_ending = file_name.split(".")[-1]
+            file_ending = os.path.splitext(file_name)[1]
             if file_ending in self.major_files:
                 file_path = os.path.join(self.path, file_name)
             else:
                 file_path = os.path.join(self.minor_path, file_name)
             file_paths.append((file_path, file_ending))
         # check if all paths exist, if such, signal not to run
-        if np.all([os.path.exists(file_path[0]) for file_path in file_paths]):
+        if all(os.path.exists(file_path[0]) for file_path in file_paths):
             return None
         # if some exist, back them up. Run through all and add them to self.files
         for file_path, file_ending in file_paths:
@@ -205,8 +209,6 @@ class Simulation:
         self.files = SimFiles(self.path)
         # put all uninteresting files into minor path
         self.set_gmx_path()
-        # import gromacs here so that gmx in path already
-        import gromacs
 
     def set_gmx_path(self) -> None:
         """ Set up environ such that it contains the gromacs given in config. """
@@ -219,13 +221,15 @@ class Simulation:
             command = shlex.split("env -i bash -c 'source {} && env'".format(gmxpath))
             to_add = subprocess.run(command, capture_output=True).stdout.decode()
             for line in to_add.split("\n"):
-                if "GMX" in line:
-                    var_name, var = line.split("=")
-                    os.environ[var_name] = var
+                if match := GMX_ENV_RE.match(line):
+                    os.environ[match.group(1)] = match.group(2)
         if "gmxlib" in self.config:
             os.environ['GMXLIB'] = self.config['gmxlib']
             LOGGER.info("Setting gmx lib: {}".format(self.config['gmxlib']))
         # TODO load module
+        # import gromacs here so that gmx in path already
+        global gromacs  # pylint: disable=global-statement
+        import gromacs  # pylint: disable=import-outside-toplevel,redefined-outer-name
 
     def add_to_gmx_kwargs(self, gmx_kwargs: dict, command_str: str) -> None:
         """ Split into commdands (start with -), add each command with its id
@@ -263,7 +267,7 @@ class Simulation:
             ignh=True,
             **gmx_kwargs,
         )
-        if not np.all([os.path.exists(file) for file in file_paths]):
+        if not all(os.path.exists(file) for file in file_paths):
             raise ValueError("pdb2gmx not successful")
 
     def gen_box(self, vacuum=False):
@@ -271,7 +275,7 @@ class Simulation:
         we need a very big box, to model vacuum. """
 
         # check newest input file before adding files
-        in_file = self.files.get_latest_by_type('gro')
+        in_file = self.files.get_latest_by_type('.gro')
         gmx_kwargs = {}
         if vacuum is True:
             out_file = self.files.add_files(['box_vac.gro'])[0]
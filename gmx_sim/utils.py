@@ -1,8 +1,14 @@
 # pylint: disable=logging-fstring-interpolation
+import contextlib
+import os
 import sys
+import tempfile
 from pathlib import Path
 import logging
-from typing import Union
+from typing import Any, Union
+import toml
+
+CACHE = Path.home() / ".gmx_sim"
 
 
 def to_path(path: Union[str, Path]) -> Path:
@@ -12,6 +18,24 @@ def to_path(path: Union[str, Path]) -> Path:
     return Path(path)
 
 
+def atomic_write_toml(path: Path, data: dict[str, Any]) -> None:
+    """ Serialize data in one go to a unique temporary file and move it into place,
+    so a crash or a concurrent writer cannot corrupt path. Best effort, as it is
+    only used for caches: failing to write is logged, not raised."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(toml.dumps(data).encode("utf-8"))
+            os.replace(tmp_name, path)
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(tmp_name)
+    except OSError as err:
+        logging.warning(f"Could not write cache file {path}: {err}")
+
+
 def get_logger(path: Path = Path("."), name: str = "gmx_sim.log") -> logging.Logger:
     """It is a LOGGER!"""
     formatter = logging.Formatter(
@@ -35,12 +59,14 @@ def get_logger(path: Path = Path("."), name: str = "gmx_sim.log") -> logging.Log
 class FileCreationLogger:
     """ Context manager to log files created during execution."""
     def __init__(self):
-        self.files_present = [f.name for f in Path(".").resolve().glob("*")]
+        self._cwd = Path.cwd()
+        self.files_present = {entry.name for entry in os.scandir(self._cwd)}
 
     def __enter__(self):
         return self
 
     def __exit__(self, _exc_type, _exc_val, _exc_tb):
-        current_files = [f.name for f in Path(".").resolve().glob("*")]
-        new_files = [f for f in current_files if f not in self.files_present]
+        new_files = [
+            entry.name for entry in os.scandir(self._cwd) if entry.name not in self.files_present
+        ]
         logging.info(f"Files created during execution: {new_files}")